@@ -4,6 +4,7 @@
  */
 
 import { NMOSClient } from './nmos-api.js';
+import { sdpParser } from './sdp-parser.js';
 import { StorageManager } from './storage.js';
 import { RDSSubscription } from './rds-subscription.js';
 import { StreamDeckBridge } from './streamdeck-bridge.js';
@@ -36,6 +37,9 @@ class BCCApplication {
         // Stream Deck bridge
         this.sdBridge = null;
 
+        // Origins that already have a preconnect hint
+        this._preconnectedOrigins = new Set();
+
         this.init();
     }
 
@@ -348,6 +352,34 @@ class BCCApplication {
         }
     }
 
+    /**
+     * Hint the browser to resolve DNS and open connections to a node's APIs early
+     */
+    preconnectNode(node) {
+        for (const url of [node.is04_url, node.is05_url]) {
+            if (!url) continue;
+
+            let origin;
+            try {
+                origin = new URL(url).origin;
+            } catch {
+                continue;
+            }
+            if (origin === location.origin || this._preconnectedOrigins.has(origin)) continue;
+            this._preconnectedOrigins.add(origin);
+
+            for (const rel of ['dns-prefetch', 'preconnect']) {
+                const link = document.createElement('link');
+                link.rel = rel;
+                link.href = origin;
+                if (rel === 'preconnect') {
+                    link.crossOrigin = 'anonymous'; // API calls are CORS fetches without credentials
+                }
+                document.head.appendChild(link);
+            }
+        }
+    }
+
     /**
      * Select and load sender node
      */
@@ -369,6 +401,7 @@ class BCCApplication {
 
         this.senderNode = node;
         const requestId = ++this._senderRequestId;
+        this.preconnectNode(node);
 
         try {
             // Create NMOS client
@@ -378,17 +411,18 @@ class BCCApplication {
             this.setLoadingState(true, 'sender');
 
             // Initialize client (if not already initialized)
+            let discovered = {};
             if (!node.version) {
                 await this.senderClient.initialize();
 
                 if (requestId !== this._senderRequestId) return;
 
-                // Update node with discovered info
-                this.storage.updateNode(nodeId, {
+                // Discovered info is saved together with the sender list below
+                discovered = {
                     is05_url: this.senderClient.is05BaseUrl,
                     version: this.senderClient.version,
                     is05_version: this.senderClient.is05Version
-                });
+                };
             } else {
                 // Use cached info
                 this.senderClient.version = node.version;
@@ -401,7 +435,7 @@ class BCCApplication {
 
             if (requestId !== this._senderRequestId) return;
 
-            this.storage.updateNode(nodeId, { senders });
+            this.storage.updateNode(nodeId, { ...discovered, senders });
             this.senderNode.senders = senders;
             this.renderSenders(senders);
 
@@ -445,6 +479,7 @@ class BCCApplication {
 
         this.receiverNode = node;
         const requestId = ++this._receiverRequestId;
+        this.preconnectNode(node);
 
         try {
             // Create NMOS client
@@ -454,17 +489,18 @@ class BCCApplication {
             this.setLoadingState(true, 'receiver');
 
             // Initialize client (if not already initialized)
+            let discovered = {};
             if (!node.version) {
                 await this.receiverClient.initialize();
 
                 if (requestId !== this._receiverRequestId) return;
 
-                // Update node with discovered info
-                this.storage.updateNode(nodeId, {
+                // Discovered info is saved together with the receiver list below
+                discovered = {
                     is05_url: this.receiverClient.is05BaseUrl,
                     version: this.receiverClient.version,
                     is05_version: this.receiverClient.is05Version
-                });
+                };
             } else {
                 // Use cached info
                 this.receiverClient.version = node.version;
@@ -477,7 +513,7 @@ class BCCApplication {
 
             if (requestId !== this._receiverRequestId) return;
 
-            this.storage.updateNode(nodeId, { receivers });
+            this.storage.updateNode(nodeId, { ...discovered, receivers });
             this.receiverNode.receivers = receivers;
             this.renderReceivers(receivers);
 
@@ -591,12 +627,13 @@ class BCCApplication {
         const connections = await Promise.all(connectionPromises);
 
         const activeConnections = connections.filter(c => c !== null);
-        console.log(`Found ${activeConnections.length} receivers with status out of ${connections.length} total`);
+
+        // One log entry for the whole refresh instead of one per receiver
+        console.log(`Found ${activeConnections.length} receivers with status out of ${connections.length} total`, activeConnections);
 
         // Update UI with connection info and enable state
         connections.forEach(conn => {
             if (conn) {
-                console.log('Displaying connection:', conn);
                 this.updateReceiverConnectionDisplay(conn.receiverId, conn.senderId, conn.senderInfo, conn.masterEnable);
             }
         });
@@ -615,8 +652,6 @@ class BCCApplication {
             const activePath = `/x-nmos/connection/${this.receiverClient.is05Version}/single/receivers/${receiverId}/active`;
             const fullUrl = `${this.receiverClient.is05BaseUrl}${activePath}`;
 
-            console.log(`Fetching active connection from: ${fullUrl}`);
-
             const response = await fetch(fullUrl, {
                 method: 'GET',
                 headers: { 'Accept': 'application/json' }
@@ -825,7 +860,6 @@ class BCCApplication {
         try {
             // PATCH the receiver's staged endpoint with new master_enable value
             const stagedPath = `/x-nmos/connection/${this.receiverClient.is05Version}/single/receivers/${receiverId}/staged`;
-            const fullUrl = `${this.receiverClient.is05BaseUrl}${stagedPath}`;
 
             const patchBody = {
                 master_enable: newEnableState,
@@ -836,20 +870,9 @@ class BCCApplication {
 
             console.log(`Toggling receiver ${receiverId} to ${newEnableState ? 'enabled' : 'disabled'}`);
 
-            const response = await fetch(fullUrl, {
-                method: 'PATCH',
-                headers: {
-                    'Content-Type': 'application/json',
-                    'Accept': 'application/json'
-                },
-                body: JSON.stringify(patchBody)
-            });
-
-            const responseData = await response.json().catch(() => null);
-
-            if (!response.ok) {
-                throw new Error(`HTTP ${response.status}`);
-            }
+            const responseData = await this.receiverClient.patchJSON(
+                stagedPath, patchBody, this.receiverClient.is05BaseUrl, true, 'high'
+            );
 
             // Wait a moment for the change to take effect
             await new Promise(resolve => setTimeout(resolve, 500));
@@ -934,6 +957,9 @@ class BCCApplication {
         });
 
         const connections = await Promise.all(connectionPromises);
+        const activeConnections = connections.filter(c => c !== null);
+        console.log(`Found ${activeConnections.length} senders with status out of ${connections.length} total`, activeConnections);
+
         connections.forEach(conn => {
             if (conn) {
                 this.updateSenderConnectionDisplay(conn.senderId, conn.masterEnable);
@@ -953,8 +979,6 @@ class BCCApplication {
             const activePath = `/x-nmos/connection/${this.senderClient.is05Version}/single/senders/${senderId}/active`;
             const fullUrl = `${this.senderClient.is05BaseUrl}${activePath}`;
 
-            console.log(`Fetching active connection from: ${fullUrl}`);
-
             const response = await fetch(fullUrl, {
                 method: 'GET',
                 headers: { 'Accept': 'application/json' }
@@ -1049,7 +1073,6 @@ class BCCApplication {
 
         try {
             const stagedPath = `/x-nmos/connection/${this.senderClient.is05Version}/single/senders/${senderId}/staged`;
-            const fullUrl = `${this.senderClient.is05BaseUrl}${stagedPath}`;
 
             const patchBody = {
                 master_enable: newEnableState,
@@ -1060,20 +1083,9 @@ class BCCApplication {
 
             console.log(`Toggling sender ${senderId} to ${newEnableState ? 'enabled' : 'disabled'}`);
 
-            const response = await fetch(fullUrl, {
-                method: 'PATCH',
-                headers: {
-                    'Content-Type': 'application/json',
-                    'Accept': 'application/json'
-                },
-                body: JSON.stringify(patchBody)
-            });
-
-            const responseData = await response.json().catch(() => null);
-
-            if (!response.ok) {
-                throw new Error(`HTTP ${response.status}`);
-            }
+            const responseData = await this.senderClient.patchJSON(
+                stagedPath, patchBody, this.senderClient.is05BaseUrl, true, 'high'
+            );
 
             // Wait for change to take effect
             await new Promise(resolve => setTimeout(resolve, 500));
@@ -1291,6 +1303,7 @@ class BCCApplication {
         const statusContainer = statusEl.parentElement;
         const corsHelpLink = document.getElementById('corsHelpLink');
         const corsAlert = document.getElementById('corsAlert');
+        let sdp = null;
 
         try {
             // Update UI
@@ -1303,16 +1316,23 @@ class BCCApplication {
 
             // Get SDP from sender
             statusEl.textContent = 'Fetching SDP from sender...';
-            const sdp = await this.senderClient.getSenderSDP(this.selectedSender);
+            sdp = await this.senderClient.getSenderSDP(this.selectedSender);
 
             // Execute patch on receiver (will check receiver state internally)
             statusEl.textContent = 'Executing patch...';
+            const cachedPath = this.storage.getCachedPatchPath(this.receiverNode.id, this.selectedReceiver.id);
             const result = await this.receiverClient.patchReceiver(
                 this.selectedReceiver.id,
                 this.selectedSender.id,
-                sdp
+                sdp,
+                cachedPath
             );
 
+            // Remember the confirmed path so the next patch skips the probe
+            if (result.paths.stagedPath !== cachedPath) {
+                this.storage.cachePatchPath(this.receiverNode.id, this.selectedReceiver.id, result.paths.stagedPath);
+            }
+
             // Save to history
             this.storage.addHistory({
                 node_id: this.receiverNode.id,
@@ -1343,11 +1363,12 @@ class BCCApplication {
             // Try to capture partial patch information for debugging
             let partialPatchBody = null;
             try {
-                // Import SDP parser to show what we attempted
-                const { SDPParser } = await import('./sdp-parser.js');
-                const parser = new SDPParser();
-                const sdp = await this.senderClient.getSenderSDP(this.selectedSender);
-                partialPatchBody = parser.parseToJSON(sdp, this.selectedSender.id, 2);
+                // Parse SDP to show what we attempted
+                // Reuse the SDP already fetched above; only fetch if that step failed
+                if (sdp === null) {
+                    sdp = await this.senderClient.getSenderSDP(this.selectedSender);
+                }
+                partialPatchBody = sdpParser.parseToJSON(sdp, this.selectedSender.id, 2);
             } catch (parseError) {
                 // If we can't even parse SDP, just note that
                 partialPatchBody = { error: 'Could not generate PATCH body', details: parseError.message };
@@ -1555,6 +1576,9 @@ class BCCApplication {
         const content = document.getElementById('historyContent');
         const history = this.storage.getAllHistory();
 
+        // Kept for toggleHistoryDetails, which renders the JSON on first open
+        this._historyEntries = history;
+
         if (history.length === 0) {
             content.innerHTML = `
                 <div class="empty-state">
@@ -1598,20 +1622,7 @@ class BCCApplication {
                                     </svg>
                                     <span>View Details</span>
                                 </button>
-                                <div class="history-json" id="history-json-${index}" style="display: none;">
-                                    ${entry.patchBody ? `
-                                        <div class="json-section">
-                                            <h4>PATCH Request Body:</h4>
-                                            <pre class="json-code">${this.escapeHtml(JSON.stringify(entry.patchBody, null, 2))}</pre>
-                                        </div>
-                                    ` : ''}
-                                    ${entry.response ? `
-                                        <div class="json-section">
-                                            <h4>Response:</h4>
-                                            <pre class="json-code">${this.escapeHtml(JSON.stringify(entry.response, null, 2))}</pre>
-                                        </div>
-                                    ` : ''}
-                                </div>
+                                <div class="history-json" id="history-json-${index}" style="display: none;"></div>
                             ` : ''}
                         </div>
                     `;
@@ -1638,20 +1649,7 @@ class BCCApplication {
                                 </svg>
                                 <span>View Details</span>
                             </button>
-                            <div class="history-json" id="history-json-${index}" style="display: none;">
-                                ${entry.patch_body ? `
-                                    <div class="json-section">
-                                        <h4>PATCH Request Body:</h4>
-                                        <pre class="json-code">${this.escapeHtml(JSON.stringify(entry.patch_body, null, 2))}</pre>
-                                    </div>
-                                ` : ''}
-                                ${entry.active_state ? `
-                                    <div class="json-section">
-                                        <h4>Active State (after patch):</h4>
-                                        <pre class="json-code">${this.escapeHtml(JSON.stringify(entry.active_state, null, 2))}</pre>
-                                    </div>
-                                ` : ''}
-                            </div>
+                            <div class="history-json" id="history-json-${index}" style="display: none;"></div>
                         ` : ''}
                     </div>
                 `;
@@ -1916,6 +1914,12 @@ class BCCApplication {
         const jsonDiv = document.getElementById(`history-json-${index}`);
         const btn = jsonDiv.previousElementSibling;
 
+        // Pretty-print JSON only when an entry is first expanded
+        if (!jsonDiv.dataset.rendered && this._historyEntries && this._historyEntries[index]) {
+            jsonDiv.innerHTML = this.renderHistoryJson(this._historyEntries[index]);
+            jsonDiv.dataset.rendered = 'true';
+        }
+
         if (jsonDiv.style.display === 'none') {
             jsonDiv.style.display = 'block';
             btn.querySelector('svg polyline').setAttribute('points', '18 15 12 9 6 15');
@@ -1927,6 +1931,22 @@ class BCCApplication {
         }
     }
 
+    /**
+     * Build the JSON detail sections for a history entry
+     */
+    renderHistoryJson(entry) {
+        const sections = entry.type === 'enable_change'
+            ? [['PATCH Request Body:', entry.patchBody], ['Response:', entry.response]]
+            : [['PATCH Request Body:', entry.patch_body], ['Active State (after patch):', entry.active_state]];
+
+        return sections.filter(([, data]) => data).map(([heading, data]) => `
+            <div class="json-section">
+                <h4>${heading}</h4>
+                <pre class="json-code">${this.escapeHtml(JSON.stringify(data, null, 2))}</pre>
+            </div>
+        `).join('');
+    }
+
     /**
      * Initialize Stream Deck bridge
      */
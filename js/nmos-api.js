@@ -3,6 +3,42 @@
  * Handles IS-04 and IS-05 communication
  */
 
+import { sdpParser } from './sdp-parser.js';
+
+// PATCH body used to probe staged paths, serialized once
+const PROBE_BODY = JSON.stringify({
+    activation: { mode: 'activate_immediate' },
+    master_enable: false
+});
+
+/**
+ * Compare two NMOS API versions numerically ("v1.10" is newer than "v1.2")
+ * Trailing slashes are ignored
+ */
+export function compareVersions(a, b) {
+    const pa = a.replace(/\//g, '').replace(/^v/, '').split('.').map(n => parseInt(n) || 0);
+    const pb = b.replace(/\//g, '').replace(/^v/, '').split('.').map(n => parseInt(n) || 0);
+    for (let i = 0; i < Math.max(pa.length, pb.length); i++) {
+        const diff = (pa[i] || 0) - (pb[i] || 0);
+        if (diff !== 0) return diff;
+    }
+    return 0;
+}
+
+/**
+ * Pick the newest version from an API version list (e.g. ["v1.0/", "v1.3/"] -> "v1.3")
+ */
+export function latestVersion(versions) {
+    if (!versions || versions.length === 0) {
+        throw new Error('No API versions available');
+    }
+    let latest = versions[0];
+    for (const v of versions) {
+        if (compareVersions(v, latest) > 0) latest = v;
+    }
+    return latest.replace(/\//g, '');
+}
+
 export class NMOSClient {
     constructor(is04BaseUrl) {
         this.is04BaseUrl = is04BaseUrl.replace(/\/$/, ''); // Remove trailing slash
@@ -18,7 +54,7 @@ export class NMOSClient {
         try {
             // Get IS-04 version
             const versions = await this.fetchJSON('/x-nmos/node/');
-            this.version = versions.sort().reverse()[0].replace(/\//g, '');
+            this.version = latestVersion(versions);
 
             // Discover IS-05 endpoint from device controls
             await this.discoverIS05();
@@ -66,7 +102,7 @@ export class NMOSClient {
                         // href does not contain version - fetch version list
                         this.is05BaseUrl = href;
                         const is05Versions = await this.fetchJSON('/x-nmos/connection/', this.is05BaseUrl);
-                        this.is05Version = is05Versions.sort().reverse()[0].replace(/\//g, '');
+                        this.is05Version = latestVersion(is05Versions);
                         console.log('✅ IS-05 version from API:', this.is05Version);
                     }
 
@@ -97,13 +133,18 @@ export class NMOSClient {
             basePort
         ];
 
-        for (const port of portsToTry) {
+        // Start all probes at once, but take results in priority order so a
+        // fast answer on a preferred port doesn't wait for slower candidates
+        const testUrls = [...new Set(portsToTry)].map(port => `${url.protocol}//${url.hostname}:${port}`);
+        const probes = testUrls.map(testUrl => this.fetchJSON('/x-nmos/connection/', testUrl));
+        probes.forEach(probe => probe.catch(() => {})); // Probes left behind after a success may still reject
+
+        for (let i = 0; i < probes.length; i++) {
             try {
-                const testUrl = `${url.protocol}//${url.hostname}:${port}`;
-                const versions = await this.fetchJSON('/x-nmos/connection/', testUrl);
+                const version = latestVersion(await probes[i]);
 
-                this.is05BaseUrl = testUrl;
-                this.is05Version = versions.sort().reverse()[0].replace(/\//g, '');
+                this.is05BaseUrl = testUrls[i];
+                this.is05Version = version;
                 console.log(`✅ IS-05 guessed successfully: ${this.is05BaseUrl}`);
                 return;
             } catch (error) {
@@ -118,10 +159,11 @@ export class NMOSClient {
      * Get all senders from IS-04
      */
     async getSenders() {
-        const senders = await this.fetchJSON(`/x-nmos/node/${this.version}/senders/`);
-
-        // Get all flows to resolve formats
-        const flows = await this.fetchJSON(`/x-nmos/node/${this.version}/flows/`);
+        // Fetch senders and flows (to resolve formats) concurrently
+        const [senders, flows] = await Promise.all([
+            this.fetchJSON(`/x-nmos/node/${this.version}/senders/`),
+            this.fetchJSON(`/x-nmos/node/${this.version}/flows/`)
+        ]);
         const flowMap = new Map(flows.map(f => [f.id, f]));
 
         return senders.map(s => {
@@ -188,23 +230,48 @@ export class NMOSClient {
             throw new Error('Sender does not have manifest_href');
         }
 
-        const response = await fetch(sender.manifest_href);
-        if (!response.ok) {
-            throw new Error(`Failed to fetch SDP: ${response.status} ${response.statusText}`);
-        }
+        try {
+            const response = await fetch(sender.manifest_href);
+            if (!response.ok) {
+                throw new Error(`Failed to fetch SDP: ${response.status} ${response.statusText}`);
+            }
 
-        return await response.text();
+            return await response.text();
+        } catch (error) {
+            if (error.name === 'TypeError' && error.message.includes('Failed to fetch')) {
+                throw new Error(`Network error: Cannot reach ${sender.manifest_href}. Check CORS settings or network connectivity.`);
+            }
+            throw error;
+        }
     }
 
     /**
      * Test PATCH path and get current receiver state
      * Sends master_enable: false to safely query receiver without changing state
+     * If a previously confirmed staged path is given, it is checked with a GET only
      */
-    async testPatchPath(receiverId) {
+    async testPatchPath(receiverId, cachedStagedPath = null) {
         const basePath = `/x-nmos/connection/${this.is05Version}/single/receivers/${receiverId}/staged`;
+        const activePath = `/x-nmos/connection/${this.is05Version}/single/receivers/${receiverId}/active/`;
         const suffixes = ['/', ''];
         let lastError = null;
 
+        // Cached path: skip the PATCH probe entirely
+        if (cachedStagedPath && cachedStagedPath.startsWith(basePath)) {
+            try {
+                const staged = await this.fetchJSON(cachedStagedPath, this.is05BaseUrl);
+                console.log(`✅ Using cached PATCH path: ${cachedStagedPath}`);
+                return {
+                    stagedPath: cachedStagedPath,
+                    activePath,
+                    currentState: staged,
+                    cached: true
+                };
+            } catch (error) {
+                console.log(`Cached path ${cachedStagedPath} failed, probing again:`, error.message);
+            }
+        }
+
         // Prefer a GET check first (some nodes reject partial PATCH bodies)
         // Then verify the same path works for PATCH (some devices accept GET with slash but reject PATCH with slash)
         for (const suffix of suffixes) {
@@ -215,14 +282,11 @@ export class NMOSClient {
 
                 // Verify this path also accepts PATCH
                 try {
-                    await this.patchJSON(path, {
-                        activation: { mode: 'activate_immediate' },
-                        master_enable: false
-                    }, this.is05BaseUrl, false);
+                    await this.patchJSON(path, PROBE_BODY, this.is05BaseUrl, false);
                     console.log(`✅ PATCH also confirmed: ${path}`);
                     return {
                         stagedPath: path,
-                        activePath: `/x-nmos/connection/${this.is05Version}/single/receivers/${receiverId}/active/`,
+                        activePath,
                         currentState: staged
                     };
                 } catch (patchError) {
@@ -239,17 +303,14 @@ export class NMOSClient {
         for (const suffix of suffixes) {
             const path = basePath + suffix;
             try {
-                const response = await this.patchJSON(path, {
-                    activation: { mode: 'activate_immediate' },
-                    master_enable: false
-                }, this.is05BaseUrl, true); // Get response body
+                const response = await this.patchJSON(path, PROBE_BODY, this.is05BaseUrl, true); // Get response body
 
                 console.log(`✅ PATCH path confirmed: ${path}`);
                 console.log('Current receiver state:', response);
 
                 return {
                     stagedPath: path,
-                    activePath: `/x-nmos/connection/${this.is05Version}/single/receivers/${receiverId}/active/`,
+                    activePath,
                     currentState: response
                 };
             } catch (error) {
@@ -278,14 +339,15 @@ export class NMOSClient {
 
     /**
      * Patch receiver with sender's SDP
+     * @param {string} cachedStagedPath - Staged path confirmed by an earlier patch (optional)
      */
-    async patchReceiver(receiverId, senderId, sdpText) {
+    async patchReceiver(receiverId, senderId, sdpText, cachedStagedPath = null) {
         if (!this.is05BaseUrl) {
             throw new Error('IS-05 endpoint not available');
         }
 
-        // Find correct PATCH path first
-        const paths = await this.testPatchPath(receiverId);
+        // Find correct PATCH path first (cached path skips the probe)
+        let paths = await this.testPatchPath(receiverId, cachedStagedPath);
 
         // Get receiver's current staged parameters (prefer testPatchPath response)
         let portCount = 2;
@@ -294,6 +356,9 @@ export class NMOSClient {
         if (paths.currentState && paths.currentState.transport_params) {
             staged = paths.currentState;
             portCount = staged.transport_params.length;
+        } else if (paths.currentState && typeof paths.currentState === 'object') {
+            // Staged state was already read without transport_params; fetching it again won't help
+            console.warn('Staged state has no transport_params, defaulting to 2 ports');
         } else {
             const stagedResult = await this.getStagedParams(receiverId, paths.stagedPath);
             portCount = stagedResult.portCount;
@@ -302,12 +367,8 @@ export class NMOSClient {
 
         console.log(`Receiver has ${portCount} transport_params ports`);
 
-        // Import SDP parser
-        const { SDPParser } = await import('./sdp-parser.js');
-        const parser = new SDPParser();
-
         // Parse SDP to get available streams (PRIMARY/SECONDARY)
-        const patchBody = parser.parseToJSON(sdpText, senderId, portCount);
+        const patchBody = sdpParser.parseToJSON(sdpText, senderId, portCount);
 
         // Merge with receiver's existing transport_params to preserve rtp_enabled states
         if (staged && staged.transport_params) {
@@ -319,13 +380,21 @@ export class NMOSClient {
 
         // Send PATCH
         console.log('Sending PATCH:', patchBody);
-        await this.patchJSON(paths.stagedPath, patchBody, this.is05BaseUrl);
-
-        // Wait a moment for activation
-        await new Promise(resolve => setTimeout(resolve, 1000));
+        const patchJson = JSON.stringify(patchBody);
+        try {
+            await this.patchJSON(paths.stagedPath, patchJson, this.is05BaseUrl, false, 'high');
+        } catch (error) {
+            // Cached path no longer accepts PATCH (e.g. firmware update): probe and retry once
+            if (!paths.cached || (error.status !== 404 && error.status !== 405)) {
+                throw error;
+            }
+            console.log(`Cached path rejected PATCH (HTTP ${error.status}), probing again`);
+            paths = await this.testPatchPath(receiverId);
+            await this.patchJSON(paths.stagedPath, patchJson, this.is05BaseUrl, false, 'high');
+        }
 
-        // Get active state
-        const activeState = await this.fetchJSON(paths.activePath, this.is05BaseUrl);
+        // Poll active state until the activation is reflected
+        const activeState = await this.waitForActivation(paths.activePath, patchBody);
 
         return {
             success: true,
@@ -335,6 +404,53 @@ export class NMOSClient {
         };
     }
 
+    /**
+     * Poll the active endpoint with backoff until it reflects the PATCH body
+     * Gives up after 1 s (the previous fixed wait) and returns the last active state read
+     */
+    async waitForActivation(activePath, patchBody) {
+        const delays = [20, 50, 100, 200, 630];
+        const deadline = Date.now() + 1000;
+        let activeState = null;
+        let lastError = null;
+
+        for (const delay of delays) {
+            const remaining = deadline - Date.now();
+            if (remaining <= 0) break;
+
+            await new Promise(resolve => setTimeout(resolve, Math.min(delay, remaining)));
+            try {
+                activeState = await this.fetchJSON(activePath, this.is05BaseUrl);
+                if (this.isActivated(activeState, patchBody)) {
+                    return activeState;
+                }
+            } catch (error) {
+                lastError = error;
+            }
+        }
+
+        if (activeState === null && lastError) {
+            throw lastError;
+        }
+        console.warn('Active state did not reflect PATCH within timeout');
+        return activeState;
+    }
+
+    /**
+     * Check whether an active state matches the PATCH body that was sent
+     */
+    isActivated(activeState, patchBody) {
+        if (!activeState || activeState.master_enable !== patchBody.master_enable) {
+            return false;
+        }
+        if (patchBody.sender_id && activeState.sender_id !== patchBody.sender_id) {
+            return false;
+        }
+        const expected = patchBody.transport_params[0];
+        const actual = activeState.transport_params ? activeState.transport_params[0] : null;
+        return !expected.multicast_ip || (actual !== null && actual.multicast_ip === expected.multicast_ip);
+    }
+
     /**
      * Merge parsed transport_params from SDP with receiver's existing params
      * Preserves receiver's rtp_enabled state when SDP provides fewer streams than receiver has ports
@@ -372,7 +488,7 @@ export class NMOSClient {
             }
 
             const versions = await versionsResponse.json();
-            const sortedVersions = versions.map(v => v.replace(/\//g, '')).sort().reverse();
+            const sortedVersions = versions.map(v => v.replace(/\//g, '')).sort(compareVersions).reverse();
 
             // Query all versions and merge results (some RDS implementations
             // only return nodes registered via the same version)
@@ -464,27 +580,35 @@ export class NMOSClient {
 
     /**
      * PATCH JSON to NMOS API
+     * body may be an object or an already serialized JSON string
+     * priority is the fetch priority: activations pass 'high' so they are not
+     * queued behind bulk active-state GETs to the same node
      */
-    async patchJSON(path, body, baseUrl = null, returnBody = false) {
+    async patchJSON(path, body, baseUrl = null, returnBody = false, priority = 'auto') {
         const url = (baseUrl || this.is05BaseUrl) + path;
 
         try {
             const response = await fetch(url, {
                 method: 'PATCH',
+                priority,
                 headers: {
                     'Content-Type': 'application/json',
                     'Accept': 'application/json'
                 },
-                body: JSON.stringify(body)
+                body: typeof body === 'string' ? body : JSON.stringify(body)
             });
 
             if (!response.ok && response.status !== 202) {
                 const errorText = await response.text();
-                throw new Error(`HTTP ${response.status}: ${errorText || response.statusText}`);
+                const patchError = new Error(`HTTP ${response.status}: ${errorText || response.statusText}`);
+                patchError.status = response.status;
+                throw patchError;
             }
 
+            // Always read the body so the connection can be reused; parse it only when requested
+            const text = await response.text();
+
             if (returnBody) {
-                const text = await response.text();
                 if (!text) {
                     return null;
                 }
@@ -3,6 +3,8 @@
  * Manages IS-04 Query API WebSocket subscriptions for real-time resource updates
  */
 
+import { latestVersion } from './nmos-api.js';
+
 const RESOURCE_PATHS = ['/nodes', '/senders', '/receivers'];
 
 export class RDSSubscription {
@@ -38,7 +40,7 @@ export class RDSSubscription {
             const res = await fetch(`${this.baseUrl}/x-nmos/query/`);
             if (!res.ok) throw new Error(`HTTP ${res.status}`);
             const versions = await res.json();
-            this.version = versions.sort().reverse()[0].replace(/\//g, '');
+            this.version = latestVersion(versions);
 
             // Create subscriptions concurrently
             await Promise.all(RESOURCE_PATHS.map(p => this._createSubscription(p)));
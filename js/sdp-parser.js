@@ -4,6 +4,21 @@
  * Based on nmos-sdp-patcher3.py
  */
 
+// transport_params entry for a receiver port with no matching SDP stream
+const DISABLED_LEG = Object.freeze({ rtp_enabled: false });
+
+/**
+ * Create an empty transport_params block for a media section
+ */
+function createEmptyBlock() {
+    return {
+        destination_port: null,
+        multicast_ip: null,
+        source_ip: null,
+        rtp_enabled: true
+    };
+}
+
 export class SDPParser {
     /**
      * Parse SDP text to IS-05 PATCH JSON format
@@ -13,14 +28,14 @@ export class SDPParser {
      * @returns {object} IS-05 PATCH body
      */
     parseToJSON(sdpText, senderId = null, receiverPortCount = 2) {
-        // Normalize line endings: convert all to \n for processing
-        const normalizedSdp = sdpText.replace(/\r\n/g, '\n').replace(/\r/g, '\n');
-
-        // For transport_file, convert to CRLF and remove consecutive empty lines
-        let normalizedSdpCrlf = normalizedSdp.replace(/\n/g, '\r\n');
-        normalizedSdpCrlf = normalizedSdpCrlf.replace(/\r\n\r\n+/g, '\r\n');
+        // Split once on any line ending (CRLF, CR or LF)
+        const lines = sdpText.split(/\r\n|\r|\n/);
 
-        const lines = normalizedSdp.split('\n');
+        // For transport_file, rejoin with CRLF and drop empty lines,
+        // keeping the final line terminator if the SDP had one
+        const endsWithNewline = lines.length > 1 && lines[lines.length - 1] === '';
+        const normalizedSdpCrlf = lines.filter(line => line !== '').join('\r\n') +
+            (endsWithNewline ? '\r\n' : '');
 
         // Build result object
         const result = {
@@ -51,64 +66,64 @@ export class SDPParser {
      */
     extractTransportParams(lines, receiverPortCount) {
         const paramBlocks = {};
-        let currentBlock = {
-            destination_port: null,
-            multicast_ip: null,
-            source_ip: null,
-            rtp_enabled: true
-        };
+        let currentBlock = createEmptyBlock();
         let currentMid = null;
 
         for (const line of lines) {
             const trimmed = line.trim();
 
-            // m= line: media description with port
-            if (trimmed.startsWith('m=')) {
-                // Save previous block with its MID before starting new media section
-                if (currentMid && currentBlock.destination_port && currentBlock.multicast_ip) {
-                    paramBlocks[currentMid] = { ...currentBlock };
-                    currentMid = null; // Reset MID for new section
+            // Dispatch on the SDP type prefix so each line is checked once
+            switch (trimmed.slice(0, 2)) {
+                // m= line: media description with port
+                case 'm=': {
+                    // Save previous block with its MID before starting new media section
+                    // (no copy needed: currentBlock is replaced right after)
+                    if (currentMid && currentBlock.destination_port && currentBlock.multicast_ip) {
+                        paramBlocks[currentMid] = currentBlock;
+                        currentMid = null; // Reset MID for new section
+                    }
+
+                    // Start new block
+                    currentBlock = createEmptyBlock();
+
+                    const parts = trimmed.split(/\s+/);
+                    if (parts.length >= 2) {
+                        currentBlock.destination_port = parseInt(parts[1]);
+                    }
+                    break;
                 }
-
-                // Start new block
-                currentBlock = {
-                    destination_port: null,
-                    multicast_ip: null,
-                    source_ip: null,
-                    rtp_enabled: true
-                };
-
-                const parts = trimmed.split(/\s+/);
-                if (parts.length >= 2) {
-                    currentBlock.destination_port = parseInt(parts[1]);
-                }
-            }
-            // c= line: connection information (multicast IP)
-            else if (trimmed.startsWith('c=IN IP4')) {
-                const parts = trimmed.split(/\s+/);
-                if (parts.length >= 3) {
-                    // Handle format: "239.0.0.1/32" or "239.0.0.1"
-                    currentBlock.multicast_ip = parts[2].split('/')[0];
+                // c= line: connection information (multicast IP)
+                case 'c=': {
+                    if (!trimmed.startsWith('c=IN IP4')) break;
+                    const parts = trimmed.split(/\s+/);
+                    if (parts.length >= 3) {
+                        // Handle format: "239.0.0.1/32" or "239.0.0.1"
+                        currentBlock.multicast_ip = parts[2].split('/')[0];
+                    }
+                    break;
                 }
-            }
-            // a=source-filter: source IP
-            else if (trimmed.startsWith('a=source-filter:')) {
-                const parts = trimmed.split(/\s+/);
-                if (parts.length >= 5) {
-                    currentBlock.source_ip = parts[parts.length - 1];
+                // a= lines: only source-filter and mid are relevant
+                case 'a=': {
+                    // a=source-filter: source IP
+                    if (trimmed.startsWith('source-filter:', 2)) {
+                        const parts = trimmed.split(/\s+/);
+                        if (parts.length >= 5) {
+                            currentBlock.source_ip = parts[parts.length - 1];
+                        }
+                    }
+                    // a=mid: media ID (primary/secondary for ST2110-7)
+                    else if (trimmed.startsWith('mid:', 2)) {
+                        currentMid = trimmed.split(':')[1].trim().toLowerCase();
+                        // Don't save here - wait for next m= line or end of loop
+                    }
+                    break;
                 }
             }
-            // a=mid: media ID (primary/secondary for ST2110-7)
-            else if (trimmed.startsWith('a=mid:')) {
-                const mid = trimmed.split(':')[1].trim().toLowerCase();
-                currentMid = mid;
-                // Don't save here - wait for next m= line or end of loop
-            }
         }
 
         // Save the last block
         if (currentMid && currentBlock.destination_port && currentBlock.multicast_ip) {
-            paramBlocks[currentMid] = { ...currentBlock };
+            paramBlocks[currentMid] = currentBlock;
         }
 
         // Build transport_params array based on detected structure
@@ -125,46 +140,27 @@ export class SDPParser {
      * Build transport_params array based on detected parameters
      */
     buildTransportParamsArray(paramBlocks, lastBlock, receiverPortCount) {
-        const params = [];
-
         // Case 1: ST2110-7 with primary and secondary
         if (paramBlocks.primary && paramBlocks.secondary) {
-            params.push(paramBlocks.primary);
-            params.push(paramBlocks.secondary);
-        }
-        // Case 2: Only primary leg
-        else if (paramBlocks.primary) {
-            params.push(paramBlocks.primary);
-            if (receiverPortCount === 2) {
-                params.push({ rtp_enabled: false });
-            }
-        }
-        // Case 3: Single stream without mid tags
-        else if (Object.keys(paramBlocks).length > 0) {
-            const firstBlock = paramBlocks[Object.keys(paramBlocks)[0]];
-            params.push(firstBlock);
-            if (receiverPortCount === 2) {
-                params.push({ rtp_enabled: false });
-            }
-        }
-        // Case 4: Fallback - use last collected block
-        else if (this.isValidBlock(lastBlock)) {
-            params.push(lastBlock);
-            if (receiverPortCount === 2) {
-                params.push({ rtp_enabled: false });
-            }
+            const params = [paramBlocks.primary, paramBlocks.secondary];
+            return receiverPortCount === 1 ? [params[0]] : params;
         }
+
+        // Single leg, first match wins:
+        // Case 2: only primary leg
+        // Case 3: single stream without mid tags (first collected block)
+        // Case 4: fallback - use last collected block
+        const single = paramBlocks.primary ||
+            Object.values(paramBlocks)[0] ||
+            (this.isValidBlock(lastBlock) ? lastBlock : null);
+
         // Case 5: No valid parameters found
-        else {
+        if (!single) {
             throw new Error('Could not extract transport_params from SDP (missing required information)');
         }
 
-        // Adjust to receiver port count
-        if (receiverPortCount === 1 && params.length > 1) {
-            return [params[0]];
-        }
-
-        return params;
+        // Disable the unused secondary port on 2-port receivers
+        return receiverPortCount === 2 ? [single, DISABLED_LEG] : [single];
     }
 
     /**
@@ -229,3 +225,6 @@ export class SDPParser {
         return info;
     }
 }
+
+// SDP parser is stateless, so one shared instance serves every caller
+export const sdpParser = new SDPParser();
@@ -8,6 +8,7 @@ const FILES_TO_CACHE = [
     './css/style.css',
     './js/app.js',
     './js/nmos-api.js',
+    './js/sdp-parser.js',
     './js/storage.js',
     './js/rds-subscription.js',
     './js/streamdeck-bridge.js'